@@ -0,0 +1,74 @@
+"""
+Huffcompress Command Line Interface
+
+Inspects and verifies files compressed by Huffcompress without
+decompressing them. Compressed files are only read, never modified,
+so many archives can be checked quickly.
+
+
+Running the CLI
+
+  python HuffcompressCLI.py info file1.huff [file2.huff ...]
+      Prints the original size, compression ratio, symbol mode, table
+      size and block count stored in each file's header.
+
+  python HuffcompressCLI.py verify file1.huff [file2.huff ...]
+      Checks the stored CRC32 checksums of each file. Exits with
+      status 1 if any file is invalid.
+"""
+
+import argparse
+import sys
+from compress_utilities import HuffFile, CompressionError
+
+
+# Prints the header fields of a compressed file
+def printInfo(filename, info):
+    print(f"{filename}: original size {info['original_size']} bytes, "
+          f"compressed size {info['compressed_size']} bytes, "
+          f"ratio {info['ratio']:.2f}:1, "
+          f"{info['symbols']} symbols, "
+          f"table size {info['table_size']} bytes, "
+          f"{info['block_count']} block(s)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="HuffcompressCLI",
+        description="Inspect and verify Huffcompress files.")
+    parser.add_argument("command", choices=["info", "verify"])
+    parser.add_argument("files", nargs="+", metavar="file")
+    args = parser.parse_args(argv)
+
+    hf = HuffFile()
+    status = 0
+    for filename in args.files:
+        try:
+            if args.command == "info":
+                printInfo(filename, hf.info_file(filename))
+                continue
+
+            result = hf.verify_file(filename)
+        except CompressionError as e:
+            print(f"{filename}: {e}", file=sys.stderr)
+            status = 1
+            continue
+
+        if result["valid"]:
+            print(f"{filename}: OK")
+        else:
+            problems = []
+            if not result["table_valid"]:
+                problems.append("table checksum mismatch")
+            if result["corrupt_blocks"]:
+                problems.append("corrupt block(s) " +
+                    ", ".join(map(str, result["corrupt_blocks"])))
+            if not problems:
+                problems.append("unexpected file size")
+            print(f"{filename}: FAILED ({'; '.join(problems)})")
+            status = 1
+
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
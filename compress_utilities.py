@@ -1,6 +1,9 @@
+import io
 import os
+import struct
 import tempfile
-from huffman_tree import HuffmanTree
+import zlib
+from huffman_tree import HuffmanTree, SYMBOLS_CODEPOINT, SYMBOLS_UTF8
 import numpy as np
 
 # set marker value to separate different sections of compressed data
@@ -13,11 +16,32 @@ MARKER_SEQUENCE = np.array([MARKER_VALUE]*MARKER_OCCURANCE, dtype=np.uint8)
 # compressed file extension name
 COMPRESSED_FILE_EXTENSION = ".huff"
 
+# magic bytes identifying a compressed file that starts with a header.
+# files without it were written by the older marker-separated format
+HEADER_MAGIC = b"HUFF"
+# version of the header layout written by compress_file
+HEADER_VERSION = 2
+# header layout (little-endian): magic, version, flags, original size,
+# length of bit string, serial table size, serial table CRC32,
+# block size, block count and header CRC32. The header CRC32 is computed
+# over the header bytes with that field set to zero
+HEADER_FORMAT = "<4sBBQQIIIII"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+HEADER_CRC_SIZE = 4
+# number of packed code bytes covered by each CRC32 checksum
+BLOCK_SIZE = 64 * 1024
+# symbol modes accepted by compress_file, stored in the header flags.
+# "char" serializes the Huffman tree with raw characters; the other modes
+# remap the used symbols to dense integers (see huffman_tree.py)
+SYMBOLS_CHAR = "char"
+SYMBOL_MODES = {SYMBOLS_CHAR: 0, SYMBOLS_CODEPOINT: 1, SYMBOLS_UTF8: 2}
+
 class HuffFile:
     """
     This class provides methods for validating the file before compression
-    or decompression, and for compressing and decompressing the file using 
-    Huffman coding.
+    or decompression, for compressing and decompressing the file using
+    Huffman coding, and for inspecting and verifying compressed files
+    without decompressing them.
     """
 
     def __init__(self):
@@ -40,6 +64,19 @@ class HuffFile:
             raise ValueError("Error! File is empty.")
 
 
+    # makes sure file is an existing compressed file before reading it
+    def _validate_compressed_file(self, filename):
+        try:
+            self._validate_file(filename)
+            # confirm file is of correct extension
+            file_extension = os.path.splitext(filename)[1]
+            if file_extension != COMPRESSED_FILE_EXTENSION:
+                raise ValueError("Error! File is not of type" +
+                                COMPRESSED_FILE_EXTENSION)
+        except ValueError as e:
+            raise CompressionError(str(e))
+
+
     def _is_text_file(self, filename):
         """
         Checks if a file is a text file.
@@ -59,7 +96,7 @@ class HuffFile:
         except UnicodeDecodeError:
             return False
         return True
-    
+
 
     def _find_marker_sequence(self, data, marker_sequence):
         """
@@ -76,27 +113,240 @@ class HuffFile:
             list: A list of starting indices of each marker array
         """
         marker_length = len(marker_sequence)
-        return [i for i in range(len(data) - marker_length + 1) 
+        return [i for i in range(len(data) - marker_length + 1)
             if np.array_equal(data[i:i+marker_length], marker_sequence)]
 
 
-    def compress_file(self, filename):
+    def _block_checksums(self, data):
+        """
+        Computes a CRC32 checksum for each BLOCK_SIZE chunk of data.
+
+        Args:
+            data (bytes): The packed code bytes of a compressed file.
+
+        Returns:
+            list: The CRC32 checksum of each block, in order
+        """
+        return [zlib.crc32(data[i:i+BLOCK_SIZE])
+                for i in range(0, len(data), BLOCK_SIZE)]
+
+
+    def _header_checksum(self, header_bytes):
+        """
+        Computes the CRC32 checksum of a header with its own checksum field
+        set to zero.
+
+        Args:
+            header_bytes (bytes): The HEADER_SIZE bytes of a header.
+
+        Returns:
+            int: The CRC32 checksum of the header
+        """
+        return zlib.crc32(header_bytes[:-HEADER_CRC_SIZE] +
+                          bytes(HEADER_CRC_SIZE))
+
+
+    def _read_header(self, file):
+        """
+        Reads the header, serial table and block checksums from the start of
+        an open compressed file, leaving the file positioned at the first
+        byte of packed code data.
+
+        Args:
+            file (file): The compressed file, opened in binary mode.
+
+        Raises:
+            CompressionError: If the header is missing, unsupported,
+            corrupted or truncated.
+
+        Returns:
+            dict: The fields stored in the header, along with the serial
+            table bytes ("table") and the block checksums ("checksums")
+        """
+
+        header_bytes = file.read(HEADER_SIZE)
+        if len(header_bytes) < HEADER_SIZE or \
+                not header_bytes.startswith(HEADER_MAGIC):
+            raise CompressionError("Error! File has no header. It was "
+                                   "compressed by an older version.")
+
+        (_, version, flags, original_size, bit_length, table_size,
+         table_crc, block_size, block_count,
+         header_crc) = struct.unpack(HEADER_FORMAT, header_bytes)
+        if version != HEADER_VERSION:
+            raise CompressionError("Error! Unsupported file version " +
+                                   str(version) + ".")
+        # the header fields are not trusted until their checksum matches
+        if self._header_checksum(header_bytes) != header_crc:
+            raise CompressionError("Error! File header is corrupted.")
+        if flags not in SYMBOL_MODES.values():
+            raise CompressionError("Error! Unsupported symbol mode " +
+                                   str(flags) + ".")
+
+        table = file.read(table_size)
+        checksum_bytes = file.read(4 * block_count)
+        if len(table) < table_size or len(checksum_bytes) < 4 * block_count:
+            raise CompressionError("Error! File is truncated.")
+
+        return {
+            "version": version,
+            "flags": flags,
+            "symbols": next(mode for mode, flag in SYMBOL_MODES.items()
+                            if flag == flags),
+            "original_size": original_size,
+            "bit_length": bit_length,
+            "table_size": table_size,
+            "table_crc": table_crc,
+            "block_size": block_size,
+            "block_count": block_count,
+            "table": table,
+            "checksums": list(struct.unpack("<" + str(block_count) + "I",
+                                            checksum_bytes)),
+        }
+
+
+    def _header_info(self, header, compressed_size):
+        """
+        Builds the report returned by info_file from a parsed header.
+
+        Args:
+            header (dict): The header returned by _read_header.
+            compressed_size (int): The size of the compressed file in bytes.
+
+        Returns:
+            dict: original_size, compressed_size, ratio (original size over
+            compressed size), symbols (the symbol mode), table_size and
+            block_count of the file
+        """
+        return {
+            "original_size": header["original_size"],
+            "compressed_size": compressed_size,
+            "ratio": header["original_size"] / compressed_size,
+            "symbols": header["symbols"],
+            "table_size": header["table_size"],
+            "block_count": header["block_count"],
+        }
+
+
+    def _verify_code(self, file, header, compressed_size):
         """
-        Compresses a file to contain binary code, serial code, and file length
-        needed for decompression.
+        Compares the serial table and each block of packed code against
+        their stored CRC32 checksums, streaming the code one block at a time.
 
-        The binary code is a string of 0s and 1s generated by the compress 
-        function in huffman_tree.py. The serial code are the instructions for 
-        recreating the Huffman tree, also obtained from the compress function 
-        in huffman_tree.py.
+        Args:
+            file (file): The compressed data, positioned at the first byte
+            of packed code as left by _read_header.
+            header (dict): The header returned by _read_header.
+            compressed_size (int): The size of the compressed file in bytes.
+
+        Returns:
+            dict: The fields reported by info_file, plus "valid" (bool),
+            "table_valid" (bool) and "corrupt_blocks" (list of the indices
+            of blocks whose checksum does not match)
+        """
+
+        table_valid = zlib.crc32(header["table"]) == header["table_crc"]
+
+        # stream the code data one block at a time, reading no further than
+        # the bit_length bits the packed code should hold
+        code_size = (header["bit_length"] + 7) // 8
+        corrupt_blocks = []
+        for index, checksum in enumerate(header["checksums"]):
+            block = file.read(max(0, min(header["block_size"], code_size -
+                                         index * header["block_size"])))
+            if zlib.crc32(block) != checksum:
+                corrupt_blocks.append(index)
+        # data beyond the last block means the file was altered
+        trailing = file.read(1)
+
+        # the packed code must hold exactly bit_length bits
+        expected_size = HEADER_SIZE + header["table_size"] + \
+            4 * header["block_count"] + code_size
+        size_valid = compressed_size == expected_size and not trailing
+
+        info = self._header_info(header, compressed_size)
+        info["table_valid"] = table_valid
+        info["corrupt_blocks"] = corrupt_blocks
+        info["valid"] = table_valid and size_valid and not corrupt_blocks
+        return info
+
+
+    def info_file(self, filename):
+        """
+        Reads only the header of a compressed file and reports what it
+        describes. No code data is read or decoded.
+
+        Args:
+            filename (str): The name of the compressed file to inspect.
+
+        Returns:
+            dict: original_size, compressed_size, ratio (original size over
+            compressed size), symbols (the symbol mode), table_size and
+            block_count of the file
+        """
+
+        self._validate_compressed_file(filename)
+
+        with open(filename, "rb") as file:
+            header = self._read_header(file)
+
+        return self._header_info(header, os.path.getsize(filename))
+
+
+    def verify_file(self, filename):
+        """
+        Checks the integrity of a compressed file without decompressing it.
+        The header, the serial table and each block of packed code data are
+        compared against the CRC32 checksums stored at compression time.
+        The file is only read, never modified.
+
+        Args:
+            filename (str): The name of the compressed file to verify.
+
+        Raises:
+            CompressionError: If the header is missing, unsupported,
+            corrupted or truncated.
+
+        Returns:
+            dict: The fields reported by info_file, plus "valid" (bool),
+            "table_valid" (bool) and "corrupt_blocks" (list of the indices
+            of blocks whose checksum does not match)
+        """
+
+        self._validate_compressed_file(filename)
+
+        with open(filename, "rb") as file:
+            header = self._read_header(file)
+            return self._verify_code(file, header,
+                                     os.path.getsize(filename))
+
+
+    def compress_file(self, filename, symbols="auto"):
+        """
+        Compresses a file to contain a header, serial code, block checksums
+        and binary code needed for decompression.
+
+        With symbols set to "char", the binary code is generated by the
+        compress_packed function in huffman_tree.py and the serial code are
+        the instructions for recreating the Huffman tree. With
+        "codepoint" or "utf8", the compress_symbols function encodes dense
+        integer symbols and the serial code is the symbol table of sorted
+        alphabet and code lengths. "auto" picks whichever of "codepoint" and
+        "utf8" gives the smaller estimated output.
+
+        The header records the original file size, the symbol mode, the
+        length of the binary code and the size of the serial code, followed
+        by a CRC32 checksum of the serial code and of each BLOCK_SIZE chunk
+        of packed binary code so the file can be verified without decoding.
 
         Args:
             filename (str): The name of the file being compressed.
+            symbols (str): "auto", "char", "codepoint" or "utf8".
 
         Returns:
             new_dir (str): The absolute location of the compressed file
         """
-        
+
         # validate if file exists, is readable, and is not empty
         try:
             self._validate_file(filename)
@@ -104,40 +354,49 @@ class HuffFile:
             # validate if file is of the right type
             if not self._is_text_file(filename):
                 raise ValueError("Error! File is not a plain text file.")
+            # validate the symbol mode
+            if symbols != "auto" and symbols not in SYMBOL_MODES:
+                raise ValueError("Error! Unknown symbol mode " +
+                                 str(symbols) + ".")
         except ValueError as e:
             raise CompressionError(str(e))
-        
+
         # open file and read input data
         with open(filename, "r") as file:
             input_data = file.read()
 
-        # obtain bit_string and serial_code from compress function
         ht = HuffmanTree()
-        bit_string, serial_code = ht.compress(input_data)
-
-        # pack bit_string
-        code_bit_array = np.array(list(map(int, bit_string)))
-        pack_code_data = np.packbits(code_bit_array)
-
-        # get length of bit string and pack into 64-bit chunk
-        bit_length = np.array([len(bit_string)], dtype=np.uint64)
-        bit_len_bytes = np.frombuffer(bit_length.tobytes(), dtype=np.uint8)
-
-        # convert serial code to bytes using UTF-8 encoding
-        serial_code_bytes = serial_code.encode('utf-8')
-        # convert each byte to binary string then join strings together
-        serial_data_bin = ''.join(format(byte, '08b') 
-                                  for byte in serial_code_bytes)
-        # pack serial_code
-        serial_data_bit_array = np.array(list(map(int, serial_data_bin)))
-        pack_serial_data = np.packbits(serial_data_bit_array)
-
-        # concatenate bit_string, length of bit_string, and serial_code
-        # separated by markers to compressed_data
-        compressed_data = np.concatenate([pack_code_data, MARKER_SEQUENCE, 
-                                          bit_len_bytes, MARKER_SEQUENCE,
-                                          pack_serial_data, MARKER_SEQUENCE])
-        
+        if symbols == SYMBOLS_CHAR:
+            # obtain packed code and serial_code from compress_packed
+            try:
+                pack_code_data, bit_length, serial_code = \
+                    ht.compress_packed(input_data)
+            except ValueError as e:
+                raise CompressionError(str(e))
+
+            # convert serial code to bytes using UTF-8 encoding
+            serial_code_bytes = serial_code.encode('utf-8')
+        else:
+            # obtain packed code and symbol table from compress_symbols
+            try:
+                pack_code_data, bit_length, serial_code_bytes, symbols = \
+                    ht.compress_symbols(input_data, symbols)
+            except ValueError as e:
+                raise CompressionError(str(e))
+
+        # checksum the serial code and each block of packed code
+        checksums = self._block_checksums(pack_code_data)
+        header = struct.pack(HEADER_FORMAT, HEADER_MAGIC, HEADER_VERSION,
+                             SYMBOL_MODES[symbols],
+                             os.path.getsize(filename), bit_length,
+                             len(serial_code_bytes),
+                             zlib.crc32(serial_code_bytes), BLOCK_SIZE,
+                             len(checksums), 0)
+        header = header[:-HEADER_CRC_SIZE] + \
+            struct.pack("<I", self._header_checksum(header))
+        checksum_bytes = struct.pack("<" + str(len(checksums)) + "I",
+                                     *checksums)
+
         # create new unique directory for the compressed file to be placed in
         curr_dir = os.path.dirname(filename) # path to current directory of the file being compressed
         temp_dir = tempfile.TemporaryDirectory(dir=curr_dir)
@@ -147,35 +406,31 @@ class HuffFile:
         os.mkdir(new_dir) # make the new directory
 
         # write compressed data to a new file with specified file extension
-        compressed_data.tofile(new_dir + "\\" + os.path.basename(filename) + 
-                               COMPRESSED_FILE_EXTENSION)
+        with open(os.path.join(new_dir, os.path.basename(filename) +
+                               COMPRESSED_FILE_EXTENSION), "wb") as f:
+            f.write(header)
+            f.write(serial_code_bytes)
+            f.write(checksum_bytes)
+            f.write(pack_code_data)
 
         # return the location of compressed file as a string
         return new_dir
 
 
-    def decompress_file(self, filename):
+    def _read_legacy_file(self, filename):
         """
-        This function decompresses a given file with COMPRESSED_FILE_EXTENSION
+        Reads a file written by the older, marker-separated format that has
+        no header or checksums.
 
-        Args: 
-            filename (str): The name of the file to decompress
+        Args:
+            filename (str): The name of the compressed file to read.
 
         Returns:
-            str: The name of the decompressed file 
+            packed_data (array): The packed binary code
+            original_length (int): The length of the binary code in bits
+            serial_data_str (str): The serialized Huffman tree
         """
 
-        try:
-            self._validate_file(filename)
-            # confirm file is of correct extension
-            original_filename, file_extension = os.path.splitext(filename)
-            if file_extension != COMPRESSED_FILE_EXTENSION:
-                raise ValueError("Error! File is not of type" + 
-                                COMPRESSED_FILE_EXTENSION)
-        except ValueError as e:
-            raise CompressionError(str(e))
-        
-        # open file and read compressed data
         # read binary file
         read_data = np.fromfile(filename, dtype=np.uint8)
 
@@ -184,34 +439,73 @@ class HuffFile:
 
         # extract packed data, length, and serial data from compressed file
         packed_data = read_data[:marker_location[0]]
-        length_data = read_data[marker_location[0] + 
+        length_data = read_data[marker_location[0] +
                                 MARKER_OCCURANCE:marker_location[1]]
-        serial_data = read_data[marker_location[1] + 
+        serial_data = read_data[marker_location[1] +
                                 MARKER_OCCURANCE:marker_location[2]]
 
-        # unpack data (bit_string) into numpy array of bits
-        unpacked_data = np.unpackbits(packed_data)
         # retrieve original length data of bit_string from file
         original_length = np.frombuffer(length_data, dtype=np.uint64)[0]
-        # convert the unpacked data (up to original length) into string
-        unpacked_data_str = ''.join(map(str, unpacked_data[:original_length]))
-
-        # unpack data (serial_code) into numpy array of bits
-        unpacked_serial_data = np.unpackbits(serial_data)
-        # convert unpacked serial data back to string
-        unpacked_serial_data_str = ''.join(map(str, unpacked_serial_data))
-        # split serial data string into 8-bit chunks
-        unpacked_serial_data_chunks = [unpacked_serial_data_str[i:i+8] for i in 
-                                       range(0, len(unpacked_serial_data_str), 8)]
-        # for each 8-bit chunk to bytes
-        unpacked_serial_data_bytes = bytes(int(chunk, 2) for chunk 
-                                           in unpacked_serial_data_chunks)
-        # decode bytes back into a string using UTF-8 decoding
-        serial_data_str = unpacked_serial_data_bytes.decode('utf-8')
-        
+        # decode serial bytes back into a string using UTF-8 decoding
+        serial_data_str = serial_data.tobytes().decode('utf-8')
+
+        return packed_data, original_length, serial_data_str
+
+
+    def decompress_file(self, filename):
+        """
+        This function decompresses a given file with COMPRESSED_FILE_EXTENSION
+
+        Args:
+            filename (str): The name of the file to decompress
+
+        Returns:
+            str: The name of the decompressed file
+        """
+
+        self._validate_compressed_file(filename)
+        original_filename = os.path.splitext(filename)[0]
+
+        # open file and read compressed data
+        with open(filename, "rb") as file:
+            is_legacy = file.read(len(HEADER_MAGIC)) != HEADER_MAGIC
+            if not is_legacy:
+                file.seek(0)
+                header = self._read_header(file)
+                packed_data = file.read()
+
+        if is_legacy:
+            packed_data, original_length, serial_data_str = \
+                self._read_legacy_file(filename)
+        else:
+            # refuse to decode a file whose checksums do not match
+            result = self._verify_code(io.BytesIO(packed_data), header,
+                                       os.path.getsize(filename))
+            if not result["valid"]:
+                raise CompressionError("Error! File is corrupted.")
+
         # create instance of huffman tree to call decompression
         ht = HuffmanTree()
-        decompressed_data = ht.decompress(unpacked_data_str, serial_data_str)
+        if not is_legacy and header["symbols"] != SYMBOLS_CHAR:
+            try:
+                decompressed_data = ht.decompress_symbols(
+                    packed_data, header["bit_length"], header["table"],
+                    header["symbols"])
+            except ValueError as e:
+                raise CompressionError(str(e))
+        else:
+            if not is_legacy:
+                original_length = header["bit_length"]
+                serial_data_str = header["table"].decode('utf-8')
+
+            # decode the packed code with the tree from the serial code
+            try:
+                decompressed_data = ht.decompress_packed(
+                    bytes(packed_data), int(original_length),
+                    serial_data_str)
+            except ValueError as e:
+                raise CompressionError(str(e))
+
         # write to compressed file the decompressed string
         # decompress file
         with open(filename, 'w') as f:
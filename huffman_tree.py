@@ -1,6 +1,25 @@
 # this python file initializes the huffman tree and other huffcompress functions
 from huffman_node import HNode
+from collections import Counter
 import heapq
+import struct
+import numpy as np
+
+# symbol modes for compress_symbols: "codepoint" uses each character's
+# Unicode code point as a symbol, "utf8" uses each byte of its UTF-8 encoding
+SYMBOLS_CODEPOINT = "codepoint"
+SYMBOLS_UTF8 = "utf8"
+# number of possible symbol values in each mode
+SYMBOL_RANGE = {SYMBOLS_CODEPOINT: 0x110000, SYMBOLS_UTF8: 0x100}
+# number of symbols encoded at a time, bounding the memory used for bits
+ENCODE_CHUNK = 1 << 16
+# number of bits decoded with a single lookup; longer codes fall back to
+# canonical decoding one length at a time
+DECODE_TABLE_BITS = 12
+# number of packed code bytes decoded at a time
+DECODE_CHUNK = 1 << 15
+# longest code length the decoder can read
+MAX_CODE_LENGTH = 57
 
 
 class HuffmanTree:
@@ -8,6 +27,11 @@ class HuffmanTree:
     This class provides methods for prioritizing nodes based on the frequency
     of each character, building the Huffman tree, assigning prefix codes to 
     each character, serializing, and deserializing the Huffman tree.
+
+    It also provides an integer-based variant that remaps the symbols used
+    in the input to a dense range 0..n-1 and describes the tree by canonical
+    code lengths, which keeps the header and decode tables small for large
+    Unicode alphabets.
     """
 
     def __init__(self):
@@ -26,10 +50,9 @@ class HuffmanTree:
             None
         """
 
-        # dictionary to store frequency of each character
-        freq = {}
-        for char in input_string:
-            freq[char] = freq.get(char, 0) + 1
+        # dictionary to store frequency of each character, in order of first
+        # occurrence
+        freq = Counter(input_string)
 
         # create nodes containing character and frequency data and push into
         # priority queue
@@ -61,11 +84,9 @@ class HuffmanTree:
         self.get_prefix_codes(root.getRight(), prefix_codes, code + "1")
 
 
-    def compress(self, input_string):
+    def build_tree(self, input_string):
         """
-        This function compresses the input string by building the Huffman tree
-        to obtain the code_string (concatenation of prefix codes) and the 
-        serial code.
+        This function builds the Huffman tree for the input string.
 
         Args:
             input_string (str): The string to be compressed.
@@ -74,8 +95,7 @@ class HuffmanTree:
             ValueError: If the input string is empty.
 
         Returns:
-            code_string (str): input_string but with respective prefix codes
-            serial_code (str): instructions to rebuild huffman tree
+            root (HNode): The root node of the Huffman tree.
         """
 
         if not input_string:
@@ -97,6 +117,27 @@ class HuffmanTree:
         # last node in priority queue is the root node
         root = heapq.heappop(self.__heap)
         root.setParent(None)
+        return root
+
+
+    def compress(self, input_string):
+        """
+        This function compresses the input string by building the Huffman tree
+        to obtain the code_string (concatenation of prefix codes) and the 
+        serial code.
+
+        Args:
+            input_string (str): The string to be compressed.
+
+        Raises:
+            ValueError: If the input string is empty.
+
+        Returns:
+            code_string (str): input_string but with respective prefix codes
+            serial_code (str): instructions to rebuild huffman tree
+        """
+
+        root = self.build_tree(input_string)
 
         serial_code = self.serialize(root)
 
@@ -152,24 +193,16 @@ class HuffmanTree:
         return serial
 
 
-    def decompress(self, input_code, serial_code):
+    def deserialize(self, serial_code):
         """
-        This function reconstructs the Huffman tree from the serialized code. 
-        Then, it traverses the Huffman tree according to the input code to 
-        decompress it back into the original string.
+        This function reconstructs the Huffman tree from the serialized code.
 
         Args:
-            input_code (str): The compressed binary code.
             serial_code (str): The serialized Huffman tree.
 
-        Raises:
-            ValueError: If the input code or serialized code is empty.
-
         Returns:
-            decompressed (str): The decompressed, original input string.
+            root_node (HNode): The root node of the Huffman tree.
         """
-        if not input_code or not serial_code:
-            raise ValueError("Error! File is empty.")
 
         stack = []
         root_node = None
@@ -199,6 +232,30 @@ class HuffmanTree:
         if len(stack) > 0:
             root_node = stack.pop()
 
+        return root_node
+
+
+    def decompress(self, input_code, serial_code):
+        """
+        This function reconstructs the Huffman tree from the serialized code. 
+        Then, it traverses the Huffman tree according to the input code to 
+        decompress it back into the original string.
+
+        Args:
+            input_code (str): The compressed binary code.
+            serial_code (str): The serialized Huffman tree.
+
+        Raises:
+            ValueError: If the input code or serialized code is empty.
+
+        Returns:
+            decompressed (str): The decompressed, original input string.
+        """
+        if not input_code or not serial_code:
+            raise ValueError("Error! File is empty.")
+
+        root_node = self.deserialize(serial_code)
+
         # decompress input code using huffman tree
         decompressed = ""
         current = root_node
@@ -217,3 +274,501 @@ class HuffmanTree:
                 current = root_node
         
         return decompressed
+
+
+    def symbolize(self, input_string, symbols):
+        """
+        Converts the input string into an array of dense integer symbols.
+        Every symbol value used in the input is mapped to its rank among the
+        used values, so symbols range from 0 to the alphabet size minus one.
+
+        Args:
+            input_string (str): The string to be compressed.
+            symbols (str): SYMBOLS_CODEPOINT or SYMBOLS_UTF8.
+
+        Returns:
+            dense (array): The input as dense integer symbols
+            alphabet (array): The sorted symbol values used in the input
+            frequencies (array): The frequency of each dense symbol
+        """
+
+        if symbols == SYMBOLS_CODEPOINT:
+            values = np.frombuffer(input_string.encode('utf-32-le'),
+                                   dtype=np.uint32)
+        else:
+            values = np.frombuffer(input_string.encode('utf-8'),
+                                   dtype=np.uint8)
+
+        # count every possible value, then keep only those that are used
+        counts = np.bincount(values, minlength=SYMBOL_RANGE[symbols])
+        alphabet = np.flatnonzero(counts)
+        remap = np.zeros(len(counts), dtype=np.int32)
+        remap[alphabet] = np.arange(len(alphabet), dtype=np.int32)
+
+        return remap[values], alphabet, counts[alphabet]
+
+
+    def build_code_lengths(self, frequencies):
+        """
+        Builds the Huffman tree over dense integer symbols and returns the
+        depth of each leaf. Nodes are integer ids rather than HNode objects:
+        leaves are 0..n-1 and each merged parent takes the next free id.
+
+        Args:
+            frequencies (array): The frequency of each dense symbol.
+
+        Returns:
+            lengths (array): The prefix code length of each dense symbol
+        """
+
+        n = len(frequencies)
+        # a lone symbol still needs one bit per occurrence
+        if n == 1:
+            return np.ones(1, dtype=np.uint8)
+
+        heap = [(int(frequency), symbol)
+                for symbol, frequency in enumerate(frequencies)]
+        heapq.heapify(heap)
+        parent = [0] * (2 * n - 1)
+
+        # pop two nodes from priority queue, record their parent, and push
+        # the parent into priority queue
+        next_id = n
+        while len(heap) > 1:
+            frequency_1, min_1 = heapq.heappop(heap)
+            frequency_2, min_2 = heapq.heappop(heap)
+            parent[min_1] = parent[min_2] = next_id
+            heapq.heappush(heap, (frequency_1 + frequency_2, next_id))
+            next_id += 1
+
+        # parents always have larger ids than their children, so walking
+        # ids downward from the root visits each parent before its children
+        depth = [0] * (2 * n - 1)
+        for node in range(2 * n - 3, -1, -1):
+            depth[node] = depth[parent[node]] + 1
+
+        return np.array(depth[:n], dtype=np.uint8)
+
+
+    def canonical_codes(self, lengths):
+        """
+        Assigns canonical prefix codes from code lengths. Symbols are ordered
+        by code length, then by symbol, and given consecutive codes, so the
+        lengths alone are enough to rebuild the codes.
+
+        Args:
+            lengths (array): The prefix code length of each dense symbol.
+
+        Returns:
+            codes (array): The prefix code of each dense symbol
+        """
+
+        codes = np.zeros(len(lengths), dtype=np.int64)
+        order = np.lexsort((np.arange(len(lengths)), lengths))
+
+        code = 0
+        previous_length = int(lengths[order[0]])
+        for symbol in order.tolist():
+            length = int(lengths[symbol])
+            code <<= length - previous_length
+            codes[symbol] = code
+            code += 1
+            previous_length = length
+
+        return codes
+
+
+    def serialize_table(self, alphabet, lengths, symbols):
+        """
+        Serializes the symbol table: the alphabet size, the code length of
+        each dense symbol, then the sorted alphabet itself. Code points are
+        stored as UTF-8 and bytes are stored as is.
+
+        Args:
+            alphabet (array): The sorted symbol values used in the input.
+            lengths (array): The prefix code length of each dense symbol.
+            symbols (str): SYMBOLS_CODEPOINT or SYMBOLS_UTF8.
+
+        Returns:
+            table (bytes): The serialized symbol table.
+        """
+
+        if symbols == SYMBOLS_CODEPOINT:
+            alphabet_bytes = ''.join(map(chr, alphabet.tolist())).encode('utf-8')
+        else:
+            alphabet_bytes = alphabet.astype(np.uint8).tobytes()
+
+        return (struct.pack("<I", len(alphabet)) +
+                lengths.astype(np.uint8).tobytes() + alphabet_bytes)
+
+
+    def deserialize_table(self, table, symbols):
+        """
+        Reverses serialize_table.
+
+        Args:
+            table (bytes): The serialized symbol table.
+            symbols (str): SYMBOLS_CODEPOINT or SYMBOLS_UTF8.
+
+        Returns:
+            alphabet (array): The sorted symbol values used in the input
+            lengths (array): The prefix code length of each dense symbol
+        """
+
+        n = struct.unpack_from("<I", table)[0]
+        lengths = np.frombuffer(table, dtype=np.uint8, count=n, offset=4)
+        alphabet_bytes = table[4 + n:]
+
+        if symbols == SYMBOLS_CODEPOINT:
+            alphabet = np.frombuffer(
+                alphabet_bytes.decode('utf-8').encode('utf-32-le'),
+                dtype=np.uint32)
+        else:
+            alphabet = np.frombuffer(alphabet_bytes, dtype=np.uint8)
+
+        return alphabet, lengths
+
+
+    def compress_symbols(self, input_string, symbols="auto"):
+        """
+        This function compresses the input string over dense integer symbols
+        and returns the packed code together with the serialized symbol
+        table.
+
+        When symbols is "auto", both code point and UTF-8 byte symbols are
+        counted and the mode with the smaller estimated output (code bits
+        plus table size) is used. A mode whose longest code exceeds
+        MAX_CODE_LENGTH is never used, since decompress_symbols could not
+        read it back.
+
+        Args:
+            input_string (str): The string to be compressed.
+            symbols (str): SYMBOLS_CODEPOINT, SYMBOLS_UTF8 or "auto".
+
+        Raises:
+            ValueError: If the input string is empty, the symbol mode is
+            unknown, or no candidate mode has codes short enough to decode.
+
+        Returns:
+            packed (bytes): The prefix codes of the input, packed into bytes
+            bit_length (int): The number of code bits in packed
+            table (bytes): The serialized symbol table
+            symbols (str): The symbol mode that was used
+        """
+
+        if not input_string:
+            raise ValueError("Error! File is empty.")
+        if symbols == "auto":
+            candidates = [SYMBOLS_CODEPOINT, SYMBOLS_UTF8]
+        elif symbols in SYMBOL_RANGE:
+            candidates = [symbols]
+        else:
+            raise ValueError("Error! Unknown symbol mode " + str(symbols) + ".")
+
+        # build the code for each candidate mode and keep the smallest
+        best = None
+        for mode in candidates:
+            dense, alphabet, frequencies = self.symbolize(input_string, mode)
+            lengths = self.build_code_lengths(frequencies)
+            if int(lengths.max()) > MAX_CODE_LENGTH:
+                continue
+            table = self.serialize_table(alphabet, lengths, mode)
+            estimate = (int(np.dot(frequencies, lengths)) + 7) // 8 + len(table)
+            if best is None or estimate < best[0]:
+                best = (estimate, mode, dense, lengths, table)
+
+        if best is None:
+            raise ValueError("Error! Codes are longer than " +
+                             str(MAX_CODE_LENGTH) + " bits.")
+
+        _, mode, dense, lengths, table = best
+        packed, bit_length = self.encode_symbols(dense, lengths)
+
+        return packed, bit_length, table, mode
+
+
+    def encode_symbols(self, dense, lengths, codes=None):
+        """
+        Encodes dense integer symbols with their prefix codes. Symbols are
+        encoded ENCODE_CHUNK at a time; bits that do not fill a whole byte
+        are carried into the next chunk.
+
+        Args:
+            dense (array): The input as dense integer symbols.
+            lengths (array): The prefix code length of each dense symbol.
+            codes (array): The prefix code of each dense symbol. Canonical
+            codes are assigned from lengths if omitted.
+
+        Returns:
+            packed (bytes): The prefix codes of the input, packed into bytes
+            bit_length (int): The number of code bits in packed
+        """
+
+        if codes is None:
+            codes = self.canonical_codes(lengths)
+        lengths = lengths.astype(np.int64)
+
+        packed = []
+        carry = np.zeros(0, dtype=np.uint8)
+        bit_length = 0
+        for start in range(0, len(dense), ENCODE_CHUNK):
+            chunk = dense[start:start + ENCODE_CHUNK]
+            chunk_lengths = lengths[chunk]
+
+            # for every output bit, find the code it belongs to and its
+            # position within that code, then extract it most significant
+            # bit first
+            bit_lengths = np.repeat(chunk_lengths, chunk_lengths)
+            bit_codes = np.repeat(codes[chunk], chunk_lengths)
+            starts = np.cumsum(chunk_lengths) - chunk_lengths
+            positions = np.arange(len(bit_lengths)) - \
+                np.repeat(starts, chunk_lengths)
+            bits = ((bit_codes >> (bit_lengths - 1 - positions)) & 1) \
+                .astype(np.uint8)
+            bit_length += len(bits)
+
+            # pack whole bytes and carry the remaining bits forward
+            bits = np.concatenate([carry, bits])
+            whole = len(bits) - len(bits) % 8
+            packed.append(np.packbits(bits[:whole]).tobytes())
+            carry = bits[whole:]
+
+        packed.append(np.packbits(carry).tobytes())
+        return b"".join(packed), bit_length
+
+
+    def decode_codes(self, packed, bit_length, codes, lengths):
+        """
+        Decodes packed prefix codes back into dense integer symbols.
+
+        The code is decoded DECODE_CHUNK bytes at a time. For every bit
+        position in a chunk, the symbol and code length that would start
+        there are found with numpy: codes of up to DECODE_TABLE_BITS bits by
+        one lookup in a table indexed by the next DECODE_TABLE_BITS bits, and
+        longer codes by searching the sorted codes of each longer length.
+        The positions where codes actually start are then found by following
+        code lengths with numpy as well.
+
+        Args:
+            packed (bytes): The prefix codes of the input, packed into bytes.
+            bit_length (int): The number of code bits in packed.
+            codes (array): The prefix code of each dense symbol.
+            lengths (array): The prefix code length of each dense symbol.
+
+        Raises:
+            ValueError: If the code does not match the codes given.
+
+        Returns:
+            dense (array): The decoded dense integer symbols
+        """
+
+        max_length = int(lengths.max())
+        # windows are read from 64-bit words starting at a byte boundary.
+        # longer codes would need ~10^12 symbols of Fibonacci frequencies
+        if max_length > MAX_CODE_LENGTH:
+            raise ValueError("Error! Invalid code.")
+        table_bits = min(max_length, DECODE_TABLE_BITS)
+
+        # lookup table: for each table_bits-bit prefix, the symbol whose code
+        # starts it and that code's length (0 if the code is longer)
+        lookup_symbol = np.zeros(1 << table_bits, dtype=np.int32)
+        lookup_length = np.zeros(1 << table_bits, dtype=np.uint8)
+        for symbol in np.flatnonzero(lengths <= table_bits).tolist():
+            shift = table_bits - int(lengths[symbol])
+            first = int(codes[symbol]) << shift
+            lookup_symbol[first:first + (1 << shift)] = symbol
+            lookup_length[first:first + (1 << shift)] = lengths[symbol]
+
+        # for each longer length, its codes in ascending order and the
+        # symbols they belong to
+        long_codes = []
+        for length in range(table_bits + 1, max_length + 1):
+            long_symbols = np.flatnonzero(lengths == length)
+            if len(long_symbols):
+                order = np.argsort(codes[long_symbols])
+                long_codes.append((length, codes[long_symbols][order],
+                                   long_symbols[order].astype(np.int32)))
+
+        # pad so every 64-bit word past the end of the code reads zeros
+        data = np.frombuffer(bytes(packed) + bytes(8), dtype=np.uint8)
+        total_bytes = len(data) - 8
+
+        decoded = []
+        position = 0
+        for start_byte in range(0, total_bytes, DECODE_CHUNK):
+            end_byte = min(start_byte + DECODE_CHUNK, total_bytes)
+            start_bit = 8 * start_byte
+            end_bit = min(8 * end_byte, bit_length)
+            if position >= end_bit:
+                continue
+
+            # 64-bit big-endian word starting at each byte of the chunk
+            words = np.zeros(end_byte - start_byte, dtype=np.uint64)
+            for k in range(8):
+                words |= data[start_byte + k:end_byte + k].astype(np.uint64) \
+                    << np.uint64(56 - 8 * k)
+
+            # the next max_length bits at every bit position of the chunk
+            offsets = np.tile(np.arange(8, dtype=np.uint64), len(words))
+            windows = (np.repeat(words, 8) << offsets) >> \
+                np.uint64(64 - max_length)
+
+            prefixes = (windows >> np.uint64(max_length - table_bits)) \
+                .astype(np.int64)
+            chunk_symbols = lookup_symbol[prefixes]
+            chunk_lengths = lookup_length[prefixes]
+
+            # resolve codes longer than table_bits. The codes are prefix
+            # free, so at most one length matches each window
+            long = np.flatnonzero(chunk_lengths == 0)
+            if len(long):
+                long_windows = windows[long].astype(np.int64)
+                for length, sorted_codes, sorted_symbols in long_codes:
+                    candidates = long_windows >> (max_length - length)
+                    index = np.minimum(np.searchsorted(sorted_codes,
+                                                       candidates),
+                                       len(sorted_codes) - 1)
+                    valid = sorted_codes[index] == candidates
+                    chunk_symbols[long[valid]] = sorted_symbols[index[valid]]
+                    chunk_lengths[long[valid]] = length
+
+            # mark the codes that start in this chunk by pointer doubling:
+            # jump[i] is where the code 2^t codes after position i starts,
+            # and reached holds the starts of the first 2^t codes. Codes
+            # that start past the chunk, or cannot be decoded, jump to n
+            n = end_bit - start_bit
+            jump = np.arange(n, dtype=np.int64) + chunk_lengths[:n]
+            jump[chunk_lengths[:n] == 0] = n
+            jump = np.append(np.minimum(jump, n), n)
+            reached = np.zeros(n + 1, dtype=bool)
+            reached[position - start_bit] = True
+            while jump[position - start_bit] != n:
+                reached[jump[np.flatnonzero(reached)]] = True
+                jump = jump[jump]
+
+            starts = np.flatnonzero(reached[:n])
+            if not chunk_lengths[starts].all():
+                raise ValueError("Error! Invalid code.")
+            decoded.append(chunk_symbols[starts])
+            position = start_bit + int(starts[-1]) + int(chunk_lengths[starts[-1]])
+
+        if position != bit_length:
+            raise ValueError("Error! Invalid code.")
+
+        return np.concatenate(decoded)
+
+
+    def decompress_symbols(self, packed, bit_length, table, symbols):
+        """
+        This function rebuilds the canonical codes from the symbol table and
+        decodes the packed code back into the original string.
+
+        Args:
+            packed (bytes): The prefix codes of the input, packed into bytes.
+            bit_length (int): The number of code bits in packed.
+            table (bytes): The serialized symbol table.
+            symbols (str): SYMBOLS_CODEPOINT or SYMBOLS_UTF8.
+
+        Raises:
+            ValueError: If the packed code or symbol table is empty, or the
+            code does not match the table.
+
+        Returns:
+            decompressed (str): The decompressed, original input string.
+        """
+
+        if not packed or not table:
+            raise ValueError("Error! File is empty.")
+
+        alphabet, lengths = self.deserialize_table(table, symbols)
+        codes = self.canonical_codes(lengths)
+        values = alphabet[self.decode_codes(packed, bit_length, codes, lengths)]
+
+        if symbols == SYMBOLS_CODEPOINT:
+            return values.astype(np.uint32).tobytes().decode('utf-32-le')
+        return values.astype(np.uint8).tobytes().decode('utf-8')
+
+
+    def tree_codes(self, root):
+        """
+        Collects the prefix code of every character in a Huffman tree as
+        arrays indexed by the character's rank in the sorted alphabet. A tree
+        that is a single leaf gives its character the one-bit code 0.
+
+        Args:
+            root (HNode): The root node of the Huffman tree.
+
+        Returns:
+            alphabet (array): The sorted code points in the tree
+            codes (array): The prefix code of each character
+            lengths (array): The prefix code length of each character
+        """
+
+        prefix_codes = {}
+        self.get_prefix_codes(root, prefix_codes, "")
+        chars = sorted(prefix_codes)
+
+        alphabet = np.array([ord(char) for char in chars], dtype=np.uint32)
+        codes = np.array([int(prefix_codes[char] or "0", 2)
+                          for char in chars], dtype=np.int64)
+        lengths = np.array([len(prefix_codes[char]) or 1
+                            for char in chars], dtype=np.int64)
+        return alphabet, codes, lengths
+
+
+    def compress_packed(self, input_string):
+        """
+        This function compresses the input string with the same Huffman tree
+        and serial code as compress, but returns the code packed into bytes
+        instead of as a string of 0s and 1s.
+
+        Args:
+            input_string (str): The string to be compressed.
+
+        Raises:
+            ValueError: If the input string is empty or its codes are longer
+            than MAX_CODE_LENGTH.
+
+        Returns:
+            packed (bytes): The prefix codes of the input, packed into bytes
+            bit_length (int): The number of code bits in packed
+            serial_code (str): instructions to rebuild huffman tree
+        """
+
+        root = self.build_tree(input_string)
+        alphabet, codes, lengths = self.tree_codes(root)
+        if int(lengths.max()) > MAX_CODE_LENGTH:
+            raise ValueError("Error! Codes are longer than " +
+                             str(MAX_CODE_LENGTH) + " bits.")
+
+        # the sorted alphabet matches the dense symbols of symbolize
+        dense = self.symbolize(input_string, SYMBOLS_CODEPOINT)[0]
+        packed, bit_length = self.encode_symbols(dense, lengths, codes)
+        return packed, bit_length, self.serialize(root)
+
+
+    def decompress_packed(self, packed, bit_length, serial_code):
+        """
+        This function reconstructs the Huffman tree from the serialized code
+        and decodes code packed by compress_packed back into the original
+        string.
+
+        Args:
+            packed (bytes): The prefix codes of the input, packed into bytes.
+            bit_length (int): The number of code bits in packed.
+            serial_code (str): The serialized Huffman tree.
+
+        Raises:
+            ValueError: If the packed code or serialized code is empty, or
+            the code does not match the tree.
+
+        Returns:
+            decompressed (str): The decompressed, original input string.
+        """
+
+        if not len(packed) or not serial_code:
+            raise ValueError("Error! File is empty.")
+
+        alphabet, codes, lengths = self.tree_codes(self.deserialize(serial_code))
+        values = alphabet[self.decode_codes(packed, bit_length, codes, lengths)]
+        return values.tobytes().decode('utf-32-le')
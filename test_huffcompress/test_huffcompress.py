@@ -1,9 +1,19 @@
 import sys
 import os
+import io
+import contextlib
+import random
+import shutil
+import struct
+import tempfile
 import unittest
-# insert your path to huffcompress here
-sys.path.insert(0, os.path.abspath('C:\\Users\\Harshavardan\\Documents\\Computer-Science-Notebook\\Python\\Huffman-Compression'))
-from compress_utilities import HuffFile, CompressionError
+from unittest import mock
+# make huffcompress importable from the repository root
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(TEST_DIR))
+from compress_utilities import HuffFile, CompressionError, HEADER_SIZE, BLOCK_SIZE
+import HuffcompressCLI
+import huffman_tree
 
 # compressed file extension name
 COMPRESSED_FILE_EXTENSION = ".huff"
@@ -12,7 +22,7 @@ class TestHuffCompress(unittest.TestCase):
 
     # test if file contents before compression equal file contents after
     # compression and decompression. Small text file ~ 1KB
-    def test_huffcompress_1(self, filename=os.path.join('test_huffcompress','test_small_file.txt')):
+    def test_huffcompress_1(self, filename=os.path.join(TEST_DIR,'test_small_file.txt')):
         hf = HuffFile()
         with open(filename, "r") as f:
             BEFORE = f.read()
@@ -29,7 +39,7 @@ class TestHuffCompress(unittest.TestCase):
     
     # test if file contents before compression equal file contents after
     # compression and decompression. Large text file ~ 11.1MB
-    def test_huffcompress_2(self, filename=os.path.join('test_huffcompress','test_large_file.txt')):
+    def test_huffcompress_2(self, filename=os.path.join(TEST_DIR,'test_large_file.txt')):
         hf = HuffFile()
         with open(filename, "r") as f:
             BEFORE = f.read()
@@ -45,7 +55,7 @@ class TestHuffCompress(unittest.TestCase):
 
     # test if file contents before compression equal file contents after
     # compression and decompression. Large html file ~ 356KB
-    def test_huffcompress_3(self, filename=os.path.join('test_huffcompress','test_html_file.html')):
+    def test_huffcompress_3(self, filename=os.path.join(TEST_DIR,'test_html_file.html')):
         hf = HuffFile()
         with open(filename, "r") as f:
             BEFORE = f.read()
@@ -60,41 +70,260 @@ class TestHuffCompress(unittest.TestCase):
         self.assertEqual(BEFORE, AFTER)
 
     # test error-handling if file has no contents ~ zero bytes
-    def test_huffcompress_4(self, filename=os.path.join('test_huffcompress','test_zero_text_file.txt')):
+    def test_huffcompress_4(self, filename=os.path.join(TEST_DIR,'test_zero_text_file.txt')):
         hf = HuffFile()
         with self.assertRaises(CompressionError):
             hf.compress_file(filename) and hf.decompress_file(filename)
 
     # test error-handling if file is a pdf 
     # (not suitable for compression with this tool)
-    def test_huffcompress_5(self, filename=os.path.join('test_huffcompress','test_incorrect_file_type_1.pdf')):
+    def test_huffcompress_5(self, filename=os.path.join(TEST_DIR,'test_incorrect_file_type_1.pdf')):
         hf = HuffFile()
         with self.assertRaises(CompressionError):
             hf.compress_file(filename) and hf.decompress_file(filename)
 
     # test error-handling if file is an image 
     # (not suitable for compression with this tool)
-    def test_huffcompress_6(self, filename=os.path.join('test_huffcompress','test_incorrect_file_type_2.jpg')):
+    def test_huffcompress_6(self, filename=os.path.join(TEST_DIR,'test_incorrect_file_type_2.jpg')):
         hf = HuffFile()
         with self.assertRaises(CompressionError):
             hf.compress_file(filename) and hf.decompress_file(filename)
 
     # test error-handling if file is an excel file 
     # (not suitable for compression with this tool)
-    def test_huffcompress_7(self, filename=os.path.join('test_huffcompress','test_incorrect_file_type_3.xls')): 
+    def test_huffcompress_7(self, filename=os.path.join(TEST_DIR,'test_incorrect_file_type_3.xls')): 
         hf = HuffFile()
         with self.assertRaises(CompressionError):
             hf.compress_file(filename) and hf.decompress_file(filename)
 
     # test error-handling if compress_file and decompress_file are given 
     # incorrect file types
-    def test_huffcompress_8(self, filename=os.path.join('test_huffcompress','test_small_file.txt')): 
+    def test_huffcompress_8(self, filename=os.path.join(TEST_DIR,'test_small_file.txt')): 
         hf = HuffFile() 
         with self.assertRaises(CompressionError):
             hf.compress_file(filename+COMPRESSED_FILE_EXTENSION)
         with self.assertRaises(CompressionError): 
             hf.decompress_file(filename)
 
+    # test that info and verify read a compressed file's header and
+    # checksums without modifying the file
+    def test_huffcompress_9(self, filename=os.path.join(TEST_DIR,'test_large_file.txt')):
+        hf = HuffFile()
+        dir_name = hf.compress_file(filename)
+        self.addCleanup(shutil.rmtree, dir_name)
+        compressed = os.path.join(dir_name, os.path.split(filename)[1]) + COMPRESSED_FILE_EXTENSION
+        with open(compressed, "rb") as f:
+            BEFORE = f.read()
+
+        info = hf.info_file(compressed)
+        self.assertEqual(info["original_size"], os.path.getsize(filename))
+        self.assertEqual(info["compressed_size"], len(BEFORE))
+        self.assertGreater(info["ratio"], 1)
+        self.assertGreater(info["table_size"], 0)
+        self.assertEqual(info["block_count"], 1)
+
+        result = hf.verify_file(compressed)
+        self.assertTrue(result["valid"])
+        self.assertEqual(result["corrupt_blocks"], [])
+
+        with open(compressed, "rb") as f:
+            AFTER = f.read()
+        self.assertEqual(BEFORE, AFTER)
+
+    # test that verify detects corrupted code data and decompress_file
+    # refuses to decode it
+    def test_huffcompress_10(self, filename=os.path.join(TEST_DIR,'test_small_file.txt')):
+        hf = HuffFile()
+        dir_name = hf.compress_file(filename)
+        self.addCleanup(shutil.rmtree, dir_name)
+        compressed = os.path.join(dir_name, os.path.split(filename)[1]) + COMPRESSED_FILE_EXTENSION
+
+        # flip the last byte of the file, which lies in the code data
+        with open(compressed, "r+b") as f:
+            f.seek(-1, os.SEEK_END)
+            last = f.read(1)
+            f.seek(-1, os.SEEK_END)
+            f.write(bytes([last[0] ^ 0xFF]))
+
+        result = hf.verify_file(compressed)
+        self.assertFalse(result["valid"])
+        self.assertTrue(result["table_valid"])
+        self.assertEqual(result["corrupt_blocks"], [0])
+        with self.assertRaises(CompressionError):
+            hf.decompress_file(compressed)
+
+    # test error-handling if info and verify are given files that are not
+    # compressed or whose header is cut short
+    def test_huffcompress_11(self, filename=os.path.join(TEST_DIR,'test_small_file.txt')):
+        hf = HuffFile()
+        with self.assertRaises(CompressionError):
+            hf.info_file(filename)
+        with self.assertRaises(CompressionError):
+            hf.verify_file(filename)
+
+        dir_name = hf.compress_file(filename)
+        self.addCleanup(shutil.rmtree, dir_name)
+        compressed = os.path.join(dir_name, os.path.split(filename)[1]) + COMPRESSED_FILE_EXTENSION
+        with open(compressed, "r+b") as f:
+            f.truncate(HEADER_SIZE + 1)
+        with self.assertRaises(CompressionError):
+            hf.verify_file(compressed)
+
+    # test if a large Unicode alphabet survives compression and decompression
+    # in every symbol mode, and that the dense modes store a smaller table
+    # than the raw character tree
+    def test_huffcompress_12(self):
+        hf = HuffFile()
+        rng = random.Random(0)
+        # ~2000 distinct CJK characters mixed with emoji and ASCII
+        BEFORE = ''.join(rng.choice([chr(rng.randrange(0x4E00, 0x4E00 + 2000)),
+                                     chr(rng.randrange(0x1F300, 0x1F600)),
+                                     rng.choice('abc \n')])
+                         for _ in range(50000))
+        work_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, work_dir)
+        filename = os.path.join(work_dir, 'test_unicode_file.txt')
+        with open(filename, "w", encoding="utf-8") as f:
+            f.write(BEFORE)
+
+        table_sizes = {}
+        for symbols in ["char", "codepoint", "utf8", "auto"]:
+            dir_name = hf.compress_file(filename, symbols)
+            compressed = os.path.join(dir_name, 'test_unicode_file.txt') + COMPRESSED_FILE_EXTENSION
+            info = hf.info_file(compressed)
+            table_sizes[symbols] = info["table_size"]
+            if symbols == "auto":
+                self.assertIn(info["symbols"], ["codepoint", "utf8"])
+
+            hf.decompress_file(compressed)
+            with open(os.path.join(dir_name, 'test_unicode_file.txt'), "r", encoding="utf-8") as f:
+                AFTER = f.read()
+            self.assertEqual(BEFORE, AFTER)
+
+        self.assertLess(table_sizes["codepoint"], table_sizes["char"])
+        self.assertLess(table_sizes["utf8"], table_sizes["codepoint"])
+
+    # test error-handling if compress_file is given an unknown symbol mode
+    def test_huffcompress_13(self, filename=os.path.join(TEST_DIR,'test_small_file.txt')):
+        hf = HuffFile()
+        with self.assertRaises(CompressionError):
+            hf.compress_file(filename, "words")
+
+    # test that edits to the header fields are caught by the header checksum
+    # instead of silently changing the reported sizes or the decoded output
+    def test_huffcompress_14(self, filename=os.path.join(TEST_DIR,'test_small_file.txt')):
+        hf = HuffFile()
+        # original size lies at offset 6 and the bit length at offset 14
+        for offset, change in [(6, 12345), (14, -1)]:
+            dir_name = hf.compress_file(filename, "char")
+            self.addCleanup(shutil.rmtree, dir_name)
+            compressed = os.path.join(dir_name, os.path.split(filename)[1]) + COMPRESSED_FILE_EXTENSION
+            with open(compressed, "r+b") as f:
+                f.seek(offset)
+                value = struct.unpack("<Q", f.read(8))[0]
+                f.seek(offset)
+                f.write(struct.pack("<Q", value + change))
+
+            with self.assertRaises(CompressionError):
+                hf.info_file(compressed)
+            with self.assertRaises(CompressionError):
+                hf.verify_file(compressed)
+            with self.assertRaises(CompressionError):
+                hf.decompress_file(compressed)
+
+    # compresses ~200KB of random printable text, which packs into more than
+    # one BLOCK_SIZE block, and returns the compressed file's path
+    def _compress_multi_block(self, hf):
+        rng = random.Random(1)
+        work_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, work_dir)
+        filename = os.path.join(work_dir, 'test_multi_block_file.txt')
+        with open(filename, "w") as f:
+            f.write(''.join(chr(rng.randrange(32, 127)) for _ in range(200000)))
+        dir_name = hf.compress_file(filename)
+        return os.path.join(dir_name, 'test_multi_block_file.txt') + COMPRESSED_FILE_EXTENSION
+
+    # test that verify streams every block and reports the index of a
+    # corrupted block past the first
+    def test_huffcompress_15(self):
+        hf = HuffFile()
+        compressed = self._compress_multi_block(hf)
+        info = hf.info_file(compressed)
+        self.assertGreater(info["block_count"], 2)
+        self.assertTrue(hf.verify_file(compressed)["valid"])
+
+        # flip a byte inside block 1 of the packed code
+        code_start = HEADER_SIZE + info["table_size"] + 4 * info["block_count"]
+        with open(compressed, "r+b") as f:
+            f.seek(code_start + BLOCK_SIZE + 10)
+            byte = f.read(1)
+            f.seek(code_start + BLOCK_SIZE + 10)
+            f.write(bytes([byte[0] ^ 0xFF]))
+
+        result = hf.verify_file(compressed)
+        self.assertFalse(result["valid"])
+        self.assertTrue(result["table_valid"])
+        self.assertEqual(result["corrupt_blocks"], [1])
+
+    # test the exit status and output of the info and verify commands
+    def test_huffcompress_16(self, filename=os.path.join(TEST_DIR,'test_small_file.txt')):
+        hf = HuffFile()
+        dir_name = hf.compress_file(filename)
+        self.addCleanup(shutil.rmtree, dir_name)
+        compressed = os.path.join(dir_name, os.path.split(filename)[1]) + COMPRESSED_FILE_EXTENSION
+        corrupted = self._compress_multi_block(hf)
+
+        def run(*argv):
+            out, err = io.StringIO(), io.StringIO()
+            with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+                status = HuffcompressCLI.main(list(argv))
+            return status, out.getvalue() + err.getvalue()
+
+        status, output = run("info", compressed)
+        self.assertEqual(status, 0)
+        self.assertIn("original size " + str(os.path.getsize(filename)), output)
+        status, output = run("verify", compressed, corrupted)
+        self.assertEqual(status, 0)
+        self.assertEqual(output.count(": OK"), 2)
+
+        # corrupt block 1, then append a byte to the valid file
+        with open(corrupted, "r+b") as f:
+            f.seek(-1, os.SEEK_END)
+            byte = f.read(1)
+            f.seek(-1, os.SEEK_END)
+            f.write(bytes([byte[0] ^ 0xFF]))
+        with open(compressed, "ab") as f:
+            f.write(b"\0")
+
+        status, output = run("verify", corrupted)
+        self.assertEqual(status, 1)
+        self.assertIn("FAILED (corrupt block(s) " + str(hf.info_file(corrupted)["block_count"] - 1) + ")", output)
+        status, output = run("verify", compressed)
+        self.assertEqual(status, 1)
+        self.assertIn("FAILED (unexpected file size)", output)
+
+        # files that are not compressed are reported as errors
+        status, output = run("info", filename)
+        self.assertEqual(status, 1)
+        self.assertIn("Error!", output)
+
+    # test that compression refuses codes longer than the decoder can read
+    # rather than writing an archive that can never be decompressed
+    def test_huffcompress_17(self):
+        hf = HuffFile()
+        work_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, work_dir)
+        filename = os.path.join(work_dir, 'test_skewed_file.txt')
+        # Fibonacci-like frequencies give a maximally deep tree
+        with open(filename, "w") as f:
+            f.write(''.join(chr(65 + i) * int(1.7 ** i) for i in range(20)))
+
+        with mock.patch.object(huffman_tree, "MAX_CODE_LENGTH", 8):
+            for symbols in ["codepoint", "utf8", "auto"]:
+                with self.assertRaises(CompressionError):
+                    hf.compress_file(filename, symbols)
+        self.assertEqual(os.listdir(work_dir), ['test_skewed_file.txt'])
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
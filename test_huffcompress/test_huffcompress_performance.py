@@ -0,0 +1,202 @@
+import sys
+import os
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+import tracemalloc
+import unittest
+# make huffcompress importable from the repository root
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(TEST_DIR))
+from compress_utilities import HuffFile, SYMBOL_MODES
+
+# compressed file extension name
+COMPRESSED_FILE_EXTENSION = ".huff"
+
+# budgets can be tightened or loosened per machine through the environment.
+# peak traced memory may not exceed MAX_PEAK_BASE_MB plus MAX_PEAK_FACTOR
+# times the input size, and the peak RSS growth of a process compressing
+# or decompressing may not exceed MAX_RSS_BASE_MB plus MAX_RSS_FACTOR
+# times the input size
+MAX_PEAK_BASE_MB = float(os.environ.get("HUFFCOMPRESS_MAX_PEAK_BASE_MB", 32))
+MAX_PEAK_FACTOR = float(os.environ.get("HUFFCOMPRESS_MAX_PEAK_FACTOR", 32))
+MAX_RSS_BASE_MB = float(os.environ.get("HUFFCOMPRESS_MAX_RSS_BASE_MB", 48))
+MAX_RSS_FACTOR = float(os.environ.get("HUFFCOMPRESS_MAX_RSS_FACTOR", 32))
+# minimum throughput in MB of original text per second
+MIN_COMPRESS_MBPS = float(os.environ.get("HUFFCOMPRESS_MIN_COMPRESS_MBPS", 1))
+MIN_DECOMPRESS_MBPS = float(os.environ.get("HUFFCOMPRESS_MIN_DECOMPRESS_MBPS", 0.5))
+# size of the generated inputs in MB
+GENERATED_MB = float(os.environ.get("HUFFCOMPRESS_GENERATED_MB", 2))
+
+MB = 1024 * 1024
+# every symbol mode compress_file accepts is held to the same budgets
+SYMBOL_MODES_MEASURED = ["auto"] + list(SYMBOL_MODES)
+
+# measures peak RSS growth of one operation in a fresh process, so earlier
+# tests do not raise the high-water mark. VmHWM is read rather than
+# resource's ru_maxrss, which Linux carries over from the parent process
+RSS_SCRIPT = """
+import sys
+sys.path.insert(0, sys.argv[1])
+from compress_utilities import HuffFile
+
+def peak_rss():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) * 1024
+
+hf = HuffFile()
+before = peak_rss()
+getattr(hf, sys.argv[2])(*sys.argv[3:])
+print(peak_rss() - before)
+"""
+
+
+@unittest.skipUnless(sys.platform.startswith("linux"),
+                     "performance budgets are calibrated for Linux")
+class TestHuffCompressPerformance(unittest.TestCase):
+
+    def setUp(self):
+        # every compressed copy goes into a scratch directory
+        self.work_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.work_dir)
+
+    # copies text into the scratch directory and returns its path
+    def _write_input(self, name, text):
+        filename = os.path.join(self.work_dir, name)
+        with open(filename, "w", encoding="utf-8") as f:
+            f.write(text)
+        return filename
+
+    # generates ~GENERATED_MB of English-like text from the large fixture
+    def _generate_words(self):
+        with open(os.path.join(TEST_DIR, 'test_large_file.txt'), "r") as f:
+            words = f.read().split()
+        rng = random.Random(0)
+        size = int(GENERATED_MB * MB)
+        chunks = []
+        while size > 0:
+            line = ' '.join(rng.choice(words) for _ in range(12)) + '\n'
+            chunks.append(line)
+            size -= len(line)
+        return self._write_input('test_generated_words.txt', ''.join(chunks))
+
+    # generates ~GENERATED_MB of CJK text with thousands of distinct characters
+    def _generate_cjk(self):
+        rng = random.Random(0)
+        count = int(GENERATED_MB * MB) // 3
+        text = ''.join(chr(rng.randrange(0x4E00, 0x4E00 + 3000))
+                       if rng.random() < 0.9 else rng.choice('，。\n ')
+                       for _ in range(count))
+        return self._write_input('test_generated_cjk.txt', text)
+
+    # compresses and decompresses a copy of filename with the given symbol
+    # mode and returns the seconds and peak traced bytes of each step
+    def _measure(self, filename, symbols, trace):
+        hf = HuffFile()
+        results = []
+        if trace:
+            tracemalloc.start()
+        start = time.perf_counter()
+        dir_name = hf.compress_file(filename, symbols)
+        results.append((time.perf_counter() - start,
+                        tracemalloc.get_traced_memory()[1] if trace else 0))
+
+        compressed = os.path.join(dir_name, os.path.basename(filename)) + COMPRESSED_FILE_EXTENSION
+        if trace:
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        hf.decompress_file(compressed)
+        results.append((time.perf_counter() - start,
+                        tracemalloc.get_traced_memory()[1] if trace else 0))
+        if trace:
+            tracemalloc.stop()
+
+        with open(filename, "r", encoding="utf-8") as f:
+            BEFORE = f.read()
+        with open(os.path.join(dir_name, os.path.basename(filename)), "r", encoding="utf-8") as f:
+            AFTER = f.read()
+        shutil.rmtree(dir_name)
+        self.assertEqual(BEFORE, AFTER)
+        return results
+
+    # asserts the traced memory peak of compression and decompression
+    # stays within budget in every symbol mode
+    def _check_peak_memory(self, filename):
+        size = os.path.getsize(filename)
+        budget = MAX_PEAK_BASE_MB * MB + MAX_PEAK_FACTOR * size
+        for symbols in SYMBOL_MODES_MEASURED:
+            with self.subTest(symbols=symbols):
+                (_, compress_peak), (_, decompress_peak) = \
+                    self._measure(filename, symbols, trace=True)
+                self.assertLessEqual(compress_peak, budget,
+                                     "compress_file peak memory over budget")
+                self.assertLessEqual(decompress_peak, budget,
+                                     "decompress_file peak memory over budget")
+
+    # asserts compression and decompression meet the minimum throughput in
+    # every symbol mode
+    def _check_throughput(self, filename):
+        size_mb = os.path.getsize(filename) / MB
+        for symbols in SYMBOL_MODES_MEASURED:
+            with self.subTest(symbols=symbols):
+                (compress_time, _), (decompress_time, _) = \
+                    self._measure(filename, symbols, trace=False)
+                self.assertGreaterEqual(size_mb / compress_time, MIN_COMPRESS_MBPS,
+                                        "compress_file throughput under budget")
+                self.assertGreaterEqual(size_mb / decompress_time, MIN_DECOMPRESS_MBPS,
+                                        "decompress_file throughput under budget")
+
+    # asserts the peak RSS growth of compressing and decompressing in a
+    # fresh process stays within budget in every symbol mode
+    def _check_peak_rss(self, filename):
+        size = os.path.getsize(filename)
+        budget = MAX_RSS_BASE_MB * MB + MAX_RSS_FACTOR * size
+        root = os.path.dirname(TEST_DIR)
+
+        for symbols in SYMBOL_MODES_MEASURED:
+            hf = HuffFile()
+            dir_name = hf.compress_file(filename, symbols)
+            self.addCleanup(shutil.rmtree, dir_name)
+            compressed = os.path.join(dir_name, os.path.basename(filename)) + COMPRESSED_FILE_EXTENSION
+
+            for args in [["compress_file", filename, symbols],
+                         ["decompress_file", compressed]]:
+                with self.subTest(symbols=symbols, method=args[0]):
+                    output = subprocess.run([sys.executable, "-c", RSS_SCRIPT,
+                                             root] + args, check=True,
+                                            capture_output=True,
+                                            text=True).stdout
+                    self.assertLessEqual(int(output.split()[-1]), budget,
+                                         args[0] + " peak RSS over budget")
+
+    # test peak memory on the large text file ~ 110KB
+    def test_performance_1(self):
+        self._check_peak_memory(os.path.join(TEST_DIR, 'test_large_file.txt'))
+
+    # test throughput on the large text file ~ 110KB
+    def test_performance_2(self):
+        self._check_throughput(os.path.join(TEST_DIR, 'test_large_file.txt'))
+
+    # test peak memory, peak RSS and throughput on generated English-like
+    # text ~ GENERATED_MB
+    def test_performance_3(self):
+        filename = self._generate_words()
+        self._check_peak_memory(filename)
+        self._check_peak_rss(filename)
+        self._check_throughput(filename)
+
+    # test peak memory, peak RSS and throughput on generated CJK text
+    # ~ GENERATED_MB
+    def test_performance_4(self):
+        filename = self._generate_cjk()
+        self._check_peak_memory(filename)
+        self._check_peak_rss(filename)
+        self._check_throughput(filename)
+
+
+if __name__ == "__main__":
+    unittest.main()